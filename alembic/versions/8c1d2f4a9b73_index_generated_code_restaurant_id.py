@@ -0,0 +1,28 @@
+"""Index generated_code by restaurant
+
+Revision ID: 8c1d2f4a9b73
+Revises: 45147d80e617
+Create Date: 2026-10-15 20:45:12.318504
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c1d2f4a9b73'
+down_revision = '45147d80e617'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_generated_code_restaurant_id_created_at',
+        'generated_code',
+        ['restaurant_id', 'created_at']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_generated_code_restaurant_id_created_at', table_name='generated_code')
@@ -0,0 +1,27 @@
+"""Generate primary key UUIDs in Postgres
+
+Revision ID: d5e7a1c3f902
+Revises: 8c1d2f4a9b73
+Create Date: 2026-10-15 20:52:37.604118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5e7a1c3f902'
+down_revision = '8c1d2f4a9b73'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # gen_random_uuid() is built in from Postgres 13, which this migration requires
+    op.alter_column('restaurants', 'id', server_default=sa.text('gen_random_uuid()'))
+    op.alter_column('generated_code', 'id', server_default=sa.text('gen_random_uuid()'))
+
+
+def downgrade() -> None:
+    op.alter_column('generated_code', 'id', server_default=None)
+    op.alter_column('restaurants', 'id', server_default=None)
@@ -1,46 +1,27 @@
 from typing import Dict, Any, List
 import logging
-import json
-
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, SystemMessage
 
+import ijson
+import orjson
+from langchain_core.messages import BaseMessage
+
+from app.agents.llm_cache import SQLiteLLMCache
+from app.agents.llm_clients import (
+    build_messages,
+    get_llm,
+    get_response_cache,
+    llm_slot,
+    prompt_cache_key,
+    retry_with_backoff,
+)
 from app.agents.state import AgentState
 from app.config import settings
+from app.models.schemas import GeneratedFileOut
 
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI LLM
-llm = ChatOpenAI(
-    model="gpt-4",
-    api_key=settings.openai_api_key,
-    temperature=0.2
-)
-
-
-def code_generator_agent(state: AgentState) -> AgentState:
-    """
-    Agent 4: Generate complete React SPA with routing using LLM.
-    
-    Args:
-        state: Current agent state
-        
-    Returns:
-        Updated state with generated React components
-    """
-    try:
-        logger.info("Starting code generation...")
-        
-        # Prepare context data
-        restaurant_name = state.restaurant_name or "Restaurant"
-        menu_categories = state.menu_categories or []
-        restaurant_info = state.restaurant_info or {}
-        design_system = state.design_system or {}
-        typography = state.typography or {}
-        layout_style = state.layout_style or "modern"
-        
-        # Create system prompt for React code generation
-        system_prompt = """You are an expert React developer specializing in creating modern, responsive restaurant websites.
+# System prompt for React code generation
+SYSTEM_PROMPT = """You are an expert React developer specializing in creating modern, responsive restaurant websites.
 
 Your task is to generate a complete React Single Page Application with the following requirements:
 
@@ -85,56 +66,149 @@ Return your response as a JSON object with this exact structure:
 
 Make sure all imports and exports are correct, and the code is production-ready."""
 
-        # Prepare context for code generation
-        context = f"""
-Restaurant: {restaurant_name}
-Menu Categories: {json.dumps(menu_categories, indent=2)}
-Restaurant Info: {json.dumps(restaurant_info, indent=2)}
-Design System: {json.dumps(design_system, indent=2)}
-Typography: {json.dumps(typography, indent=2)}
-Layout Style: {layout_style}
-"""
-        
-        human_message = f"Generate a complete React SPA for this restaurant:\n\n{context}"
-        
-        # Get LLM response
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=human_message)
-        ]
+
+async def code_generator_agent(state: AgentState) -> AgentState:
+    """
+    Agent 4: Generate complete React SPA with routing using LLM.
+    
+    Args:
+        state: Current agent state
         
-        response = llm.invoke(messages)
-        code_data_str = response.content
+    Returns:
+        Updated state with generated React components
+    """
+    try:
+        logger.info("Starting code generation...")
         
-        # Parse JSON response
-        try:
-            code_data = json.loads(code_data_str)
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse code generation JSON response: {e}")
-            # Try to extract JSON from response if it's wrapped in markdown
-            if "```json" in code_data_str:
-                json_start = code_data_str.find("```json") + 7
-                json_end = code_data_str.find("```", json_start)
-                if json_end > json_start:
-                    code_data = json.loads(code_data_str[json_start:json_end])
-                else:
-                    raise e
-            else:
-                raise e
+        human_message = _build_human_message(state)
         
-        # Extract components from response
-        components = code_data.get("components", [])
+        # Streamed responses bypass the LangChain cache, so look up the parsed components
+        # directly. A regeneration sends the same prompt, so it must not replay the
+        # output that just failed validation.
+        response_cache = get_response_cache()
+        if response_cache is not None and state.iterations == 0:
+            cached_components = await response_cache.aget(_cache_key(response_cache, human_message))
+            if cached_components:
+                logger.info("Using cached code generation response")
+                return _apply_components(state, cached_components)
         
-        # Update state
-        state.generated_components = components
-        state.component_files = components
+        # Code is only cached once it passes validation, never by the client itself
+        llm = get_llm(temperature=0.2, cache=False)
         
-        logger.info(f"Code generation completed. Generated {len(components)} components")
+        # Stream the response, parsing components as each one completes. They only
+        # reach the state once the whole stream has been parsed; a failed attempt
+        # is retried from the start.
+        components = await retry_with_backoff(
+            _stream_components, llm, build_messages(SYSTEM_PROMPT, human_message)
+        )
         
-        return state
+        return _apply_components(state, components)
         
     except Exception as e:
-        logger.error(f"Error in code generator agent: {e}")
-        state.final_status = "failed"
-        state.error_message = f"Code generation failed: {str(e)}"
-        return state
+        logger.error("Error in code generator agent: %s", e)
+        return _mark_failed(state, e)
+
+
+async def cache_validated_components(state: AgentState) -> None:
+    """
+    Store the generated components in the response cache.
+    
+    Called by the validator once the components pass, so that a failed
+    generation is never replayed from the cache. Nothing is stored if the
+    run has already failed, e.g. because the stream broke off.
+    
+    Args:
+        state: Agent state with validated components
+    """
+    response_cache = get_response_cache()
+    if response_cache is None or state.final_status == "failed" or not state.generated_components:
+        return
+    
+    cache_key = _cache_key(response_cache, _build_human_message(state))
+    await response_cache.aset(cache_key, state.generated_components)
+
+
+def _cache_key(response_cache: SQLiteLLMCache, human_message: str) -> str:
+    """Build the response cache key for a code generation prompt."""
+    return response_cache.make_key(settings.openai_model, SYSTEM_PROMPT, human_message)
+
+
+def _build_human_message(state: AgentState) -> str:
+    """Build the per-restaurant code generation prompt."""
+    # Prepare context data
+    restaurant_name = state.restaurant_name or "Restaurant"
+    menu_categories = state.menu_categories or []
+    restaurant_info = state.restaurant_info or {}
+    design_system = state.design_system or {}
+    typography = state.typography or {}
+    layout_style = state.layout_style or "modern"
+    
+    # Prepare context for code generation
+    context = f"""
+Restaurant: {restaurant_name}
+Menu Categories: {orjson.dumps(menu_categories).decode()}
+Restaurant Info: {orjson.dumps(restaurant_info).decode()}
+Design System: {orjson.dumps(design_system).decode()}
+Typography: {orjson.dumps(typography).decode()}
+Layout Style: {layout_style}
+"""
+    
+    return f"Generate a complete React SPA for this restaurant:\n\n{context}"
+
+
+def _apply_components(state: AgentState, components: List[Dict[str, str]]) -> AgentState:
+    """Store the generated components on the state."""
+    state.generated_components = components
+    state.component_files = components
+    
+    logger.info("Code generation completed. Generated %d components", len(components))
+    
+    return state
+
+
+def _mark_failed(state: AgentState, error: Exception) -> AgentState:
+    """Mark the state as failed after a generation error, dropping any partial output."""
+    state.generated_components = []
+    state.component_files = []
+    state.final_status = "failed"
+    state.error_message = f"Code generation failed: {str(error)}"
+    return state
+
+
+async def _stream_components(llm, messages: List[BaseMessage]) -> List[Dict[str, str]]:
+    """
+    Stream the code generation response, parsing components incrementally.
+    
+    The model runs in JSON mode, so the stream is a bare JSON document and
+    each finished item of the "components" array is parsed while later files
+    are still streaming.
+    
+    Args:
+        llm: Chat model to stream from
+        messages: Prompt messages
+        
+    Returns:
+        Parsed components, in response order
+    """
+    components = []
+    parsed_items = ijson.sendable_list()
+    parser = ijson.items_coro(parsed_items, "components.item")
+    
+    async with llm_slot():
+        async for chunk in llm.astream(
+            messages,
+            response_format={"type": "json_object"},
+            prompt_cache_key=prompt_cache_key(SYSTEM_PROMPT)
+        ):
+            if not chunk.content:
+                continue
+            parser.send(chunk.content.encode("utf-8"))
+            
+            for item in parsed_items:
+                components.append(GeneratedFileOut.model_validate(item).model_dump())
+            del parsed_items[:]
+    
+    parser.close()
+    for item in parsed_items:
+        components.append(GeneratedFileOut.model_validate(item).model_dump())
+    return components
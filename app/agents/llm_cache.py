@@ -0,0 +1,100 @@
+from typing import Any, Optional, Sequence
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+
+import orjson
+from langchain_core.caches import BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+
+def _json_default(value: Any) -> Any:
+    """Serialize parsed structured output attached to cached messages."""
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class SQLiteLLMCache(BaseCache):
+    """
+    Content-addressed LLM response cache stored in a local SQLite file.
+    
+    Entries are keyed by a SHA-256 hash of the request, so replaying the same
+    prompt against the same model settings skips the OpenAI round trip. Besides
+    the LangChain cache interface used by ChatOpenAI, arbitrary JSON values can
+    be stored with `aget`/`aset` for results that never pass through invoke
+    (such as streamed responses).
+    """
+    
+    def __init__(self, database_path: str, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(database_path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._connection.commit()
+    
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """Hash the request parts into a cache key."""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(hashlib.sha256(part.encode("utf-8")).digest())
+        return digest.hexdigest()
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Get a cached JSON value, or None if missing or expired."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return orjson.loads(row[0])
+    
+    def set(self, key: str, value: Any) -> None:
+        """Store a JSON value under the given key."""
+        payload = orjson.dumps(value, default=_json_default).decode()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, payload, time.time() + self.ttl_seconds)
+            )
+            self._connection.commit()
+    
+    async def aget(self, key: str) -> Optional[Any]:
+        """Async version of get, run in a worker thread."""
+        return await asyncio.to_thread(self.get, key)
+    
+    async def aset(self, key: str, value: Any) -> None:
+        """Async version of set, run in a worker thread."""
+        await asyncio.to_thread(self.set, key, value)
+    
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        """Look up cached chat generations for a prompt."""
+        cached = self.get(self.make_key(prompt, llm_string))
+        if cached is None:
+            return None
+        return [ChatGeneration(message=message) for message in messages_from_dict(cached)]
+    
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        """Cache the chat generations for a prompt."""
+        if not all(isinstance(generation, ChatGeneration) for generation in return_val):
+            return
+        messages = [message_to_dict(generation.message) for generation in return_val]
+        self.set(self.make_key(prompt, llm_string), messages)
+    
+    def clear(self, **kwargs: Any) -> None:
+        """Remove every cached entry."""
+        with self._lock:
+            self._connection.execute("DELETE FROM llm_cache")
+            self._connection.commit()
@@ -0,0 +1,231 @@
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Type, TypeVar
+from contextlib import asynccontextmanager
+from functools import lru_cache
+import asyncio
+import hashlib
+import logging
+import random
+import weakref
+
+import httpx
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import Runnable
+from pydantic import BaseModel
+
+from app.agents.llm_cache import SQLiteLLMCache
+from app.config import settings
+
+# langchain_openai (and openai) are imported on first use so that workers which
+# never reach an LLM call skip their import cost
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+
+logger = logging.getLogger(__name__)
+
+# One HTTP pool and one set of chat clients per event loop. httpx clients are
+# bound to the loop they were first used on, so they cannot be shared across
+# loops. Pooled connections keep a reference to their loop, so an entry does
+# not disappear with its loop; every loop that made OpenAI calls must await
+# aclose_http_clients() before it closes.
+_http_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_llm_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[float, bool], ChatOpenAI]]" = weakref.WeakKeyDictionary()
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+# Responses are only cached for near-deterministic calls
+CACHEABLE_MAX_TEMPERATURE = 0.2
+
+T = TypeVar("T")
+SchemaT = TypeVar("SchemaT", bound=BaseModel)
+
+
+def _get_http_client(loop: asyncio.AbstractEventLoop) -> httpx.AsyncClient:
+    """Get the pooled HTTP client shared by every agent on this event loop."""
+    http_client = _http_clients.get(loop)
+    if http_client is None:
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_keepalive_connections=settings.llm_max_keepalive_connections),
+            timeout=settings.llm_timeout
+        )
+        _http_clients[loop] = http_client
+    return http_client
+
+
+async def aclose_http_clients() -> None:
+    """
+    Close the HTTP pool of the running event loop.
+    
+    The loop's chat clients and semaphore are dropped as well, so nothing
+    here keeps the loop alive; later calls on this loop create fresh ones.
+    """
+    loop = asyncio.get_running_loop()
+    _llm_clients.pop(loop, None)
+    _semaphores.pop(loop, None)
+    http_client = _http_clients.pop(loop, None)
+    if http_client is not None:
+        await http_client.aclose()
+        logger.info("LLM HTTP connection pool closed")
+
+
+@lru_cache(maxsize=1)
+def get_response_cache() -> Optional[SQLiteLLMCache]:
+    """Get the shared LLM response cache, or None if caching is disabled."""
+    if not settings.llm_cache_path:
+        return None
+    logger.info("LLM response cache enabled at %s", settings.llm_cache_path)
+    return SQLiteLLMCache(settings.llm_cache_path, ttl_seconds=settings.llm_cache_ttl_seconds)
+
+
+def get_llm(temperature: float, cache: bool = True) -> "ChatOpenAI":
+    """
+    Get the shared chat model for the given temperature.
+    
+    Must be called from inside a running event loop. Clients are cached per
+    loop and all of them reuse the same HTTP connection pool. Clients with a
+    temperature up to CACHEABLE_MAX_TEMPERATURE use the response cache when
+    it is enabled, unless `cache` is False.
+    
+    Args:
+        temperature: Sampling temperature
+        cache: Whether responses may be served from and stored in the response cache
+        
+    Returns:
+        Cached ChatOpenAI client
+    """
+    loop = asyncio.get_running_loop()
+    loop_clients = _llm_clients.setdefault(loop, {})
+    use_cache = cache and temperature <= CACHEABLE_MAX_TEMPERATURE
+    
+    llm = loop_clients.get((temperature, use_cache))
+    if llm is None:
+        from langchain_openai import ChatOpenAI
+        
+        response_cache = get_response_cache() if use_cache else None
+        llm = ChatOpenAI(
+            model=settings.openai_model,
+            api_key=settings.openai_api_key,
+            temperature=temperature,
+            max_retries=0,  # Retried by retry_with_backoff instead, see call_llm
+            timeout=settings.llm_timeout,
+            http_async_client=_get_http_client(loop),
+            cache=response_cache
+        )
+        loop_clients[(temperature, use_cache)] = llm
+        logger.debug("Created LLM client (temperature=%s, cache=%s)", temperature, use_cache)
+    
+    return llm
+
+
+@lru_cache(maxsize=32)
+def prompt_cache_key(system_prompt: str) -> str:
+    """
+    Get a stable OpenAI prompt cache key for a system prompt.
+    
+    OpenAI caches prompt prefixes automatically; sending the same key for
+    requests that share a system prompt routes them to the same cache. The
+    system prompt must stay the first message and identical across calls,
+    with all per-request data kept in the human message.
+    
+    Args:
+        system_prompt: Static system prompt text
+        
+    Returns:
+        Cache key derived from the prompt content
+    """
+    digest = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+    return f"menu2site-{digest[:16]}"
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    """Get the semaphore capping concurrent OpenAI calls on this event loop."""
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(settings.llm_max_async)
+        _semaphores[loop] = semaphore
+    return semaphore
+
+
+@asynccontextmanager
+async def llm_slot() -> AsyncIterator[None]:
+    """Hold one of the concurrent OpenAI call slots, e.g. for a streamed response."""
+    async with _get_semaphore():
+        yield
+
+
+async def retry_with_backoff(call: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+    """
+    Retry an OpenAI call with full-jitter exponential backoff.
+    
+    The clients are built with max_retries=0, so this is the only retry layer.
+    Rate limits are retried up to llm_rate_limit_retries times, connection and
+    server errors up to llm_max_retries times. The call should take its own
+    concurrency slot, so that no slot is held while waiting between attempts.
+    """
+    import openai
+    
+    rate_limit_retries = 0
+    transient_retries = 0
+    while True:
+        try:
+            return await call(*args, **kwargs)
+        except openai.RateLimitError:
+            if rate_limit_retries == settings.llm_rate_limit_retries:
+                raise
+            rate_limit_retries += 1
+            attempt, reason = rate_limit_retries, "rate limit hit"
+        except (openai.APIConnectionError, openai.InternalServerError):
+            if transient_retries == settings.llm_max_retries:
+                raise
+            transient_retries += 1
+            attempt, reason = transient_retries, "request failed"
+        
+        delay = random.uniform(0, 2 ** (attempt - 1))
+        logger.warning("OpenAI %s, retrying in %.2fs (attempt %d)", reason, delay, attempt)
+        await asyncio.sleep(delay)
+
+
+async def call_llm(llm: Runnable, messages: Any, **kwargs: Any) -> Any:
+    """
+    Invoke an LLM runnable under the concurrency cap, retrying on rate limits.
+    
+    Args:
+        llm: Chat model or structured-output runnable
+        messages: Prompt messages
+        **kwargs: Extra request parameters passed to ainvoke
+        
+    Returns:
+        The runnable's output
+    """
+    async def _invoke() -> Any:
+        async with _get_semaphore():
+            return await llm.ainvoke(messages, **kwargs)
+    
+    return await retry_with_backoff(_invoke)
+
+
+def build_messages(system: str, human: str) -> List[BaseMessage]:
+    """Build a prompt with the static system prompt first, so its prefix stays cacheable."""
+    return [
+        SystemMessage(content=system),
+        HumanMessage(content=human)
+    ]
+
+
+async def structured_call(system: str, human: str, schema: Type[SchemaT], *, temperature: float) -> SchemaT:
+    """
+    Ask the model for a response matching a pydantic schema.
+    
+    Goes through call_llm, so the response cache, concurrency cap, rate-limit
+    backoff and prompt cache key all apply.
+    
+    Args:
+        system: Static system prompt
+        human: Per-request prompt
+        schema: Output model the response is parsed into
+        temperature: Sampling temperature
+        
+    Returns:
+        Parsed response
+    """
+    llm = get_llm(temperature).with_structured_output(schema)
+    return await call_llm(llm, build_messages(system, human), prompt_cache_key=prompt_cache_key(system))
@@ -1,38 +1,15 @@
-from typing import Dict, Any
+from typing import Dict, Any, List
 import logging
-import json
-
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, SystemMessage
 
+from app.agents.llm_clients import structured_call
 from app.agents.state import AgentState
-from app.config import settings
+from app.models.schemas import MenuStructureOut
+from app.utils.patterns import PRICE
 
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI LLM
-llm = ChatOpenAI(
-    model="gpt-4",
-    api_key=settings.openai_api_key,
-    temperature=0.1
-)
-
-
-def menu_structurer_agent(state: AgentState) -> AgentState:
-    """
-    Agent 2: Structure extracted text into organized menu data.
-    
-    Args:
-        state: Current agent state
-        
-    Returns:
-        Updated state with structured menu data
-    """
-    try:
-        logger.info("Starting menu structuring...")
-        
-        # Create system prompt for menu structuring
-        system_prompt = """You are an expert at analyzing restaurant menu text and extracting structured information.
+# System prompt for menu structuring
+SYSTEM_PROMPT = """You are an expert at analyzing restaurant menu text and extracting structured information.
 
 Your task is to parse the provided menu text and extract:
 1. Restaurant name
@@ -66,51 +43,96 @@ Return your response as a JSON object with this exact structure:
 
 Be precise and accurate. If information is not available, use null or empty strings."""
 
-        # Create human message with extracted text
-        human_message = f"Please analyze this restaurant menu text and extract the structured information:\n\n{state.extracted_text}"
-        
-        # Get LLM response
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=human_message)
-        ]
-        
-        response = llm.invoke(messages)
-        structured_data_str = response.content
-        
-        # Parse JSON response
-        try:
-            structured_data = json.loads(structured_data_str)
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON response: {e}")
-            # Try to extract JSON from response if it's wrapped in markdown
-            if "```json" in structured_data_str:
-                json_start = structured_data_str.find("```json") + 7
-                json_end = structured_data_str.find("```", json_start)
-                if json_end > json_start:
-                    structured_data = json.loads(structured_data_str[json_start:json_end])
-                else:
-                    raise e
-            else:
-                raise e
+
+async def menu_structurer_agent(state: AgentState) -> Dict[str, Any]:
+    """
+    Agent 2: Structure extracted text into organized menu data.
+    
+    Runs in parallel with the UI designer, so it only returns the fields it
+    owns.
+    
+    Args:
+        state: Current agent state
         
-        # Update state with structured data
-        state.structured_data = structured_data
-        state.restaurant_name = structured_data.get("restaurant_name") if structured_data else "Restaurant"
-        state.menu_categories = structured_data.get("menu_categories", []) if structured_data else []
-        state.restaurant_info = structured_data.get("restaurant_info", {}) if structured_data else {}
+    Returns:
+        State update with structured menu data
+    """
+    try:
+        logger.info("Starting menu structuring...")
         
-        logger.info(f"Menu structuring completed. Found {len(state.menu_categories)} categories for {state.restaurant_name}")
+        menu_structure = await structured_call(
+            SYSTEM_PROMPT,
+            _build_human_message(state),
+            MenuStructureOut,
+            temperature=0.1
+        )
         
-        return state
+        return _menu_structure_update(menu_structure)
         
     except Exception as e:
-        logger.error(f"Error in menu structurer agent: {e}")
-        # Ensure state remains valid even if parsing fails
-        state.structured_data = {}
-        state.restaurant_name = "Restaurant"
-        state.menu_categories = []
-        state.restaurant_info = {}
-        state.final_status = "failed"
-        state.error_message = f"Menu structuring failed: {str(e)}"
-        return state
+        logger.error("Error in menu structurer agent: %s", e)
+        return _failure_update(e)
+
+
+def _build_human_message(state: AgentState) -> str:
+    """Build the per-restaurant prompt from the menu-relevant sections only."""
+    menu_text = _select_menu_text(state)
+    return f"Please analyze this restaurant menu text and extract the structured information:\n\n{menu_text}"
+
+
+def _select_menu_text(state: AgentState) -> str:
+    """
+    Join the extracted sections worth sending to the LLM.
+    
+    Sections found under a menu header are always kept, whatever their price
+    format. Untitled sections (the preamble, or blank-line splits when the
+    menu has no headers) are kept when they mention a price, along with the
+    first and last sections, which usually carry the restaurant name, address
+    and opening hours. If nothing qualifies, all sections are kept.
+    """
+    sections = state.extracted_sections
+    if not sections:
+        return ""
+    
+    last = len(sections) - 1
+    relevant = [
+        bool(section["title"]) or bool(PRICE.search(section["text"]))
+        for section in sections
+    ]
+    if not any(relevant):
+        return "\n\n".join(section["text"] for section in sections)
+    
+    return "\n\n".join(
+        section["text"]
+        for i, section in enumerate(sections)
+        if relevant[i] or i == 0 or i == last
+    )
+
+
+def _menu_structure_update(menu_structure: MenuStructureOut) -> Dict[str, Any]:
+    """Build the state update for the structured menu data."""
+    structured_data = menu_structure.model_dump()
+    
+    update = {
+        "structured_data": structured_data,
+        "restaurant_name": structured_data.get("restaurant_name") if structured_data else "Restaurant",
+        "menu_categories": structured_data.get("menu_categories", []) if structured_data else [],
+        "restaurant_info": structured_data.get("restaurant_info", {}) if structured_data else {},
+    }
+    
+    logger.info("Menu structuring completed. Found %d categories for %s", len(update['menu_categories']), update['restaurant_name'])
+    
+    return update
+
+
+def _failure_update(error: Exception) -> Dict[str, Any]:
+    """Build the state update that resets the menu data and marks the run as failed."""
+    # Ensure state remains valid even if parsing fails
+    return {
+        "structured_data": {},
+        "restaurant_name": "Restaurant",
+        "menu_categories": [],
+        "restaurant_info": {},
+        "final_status": "failed",
+        "error_message": f"Menu structuring failed: {str(error)}",
+    }
@@ -1,4 +1,5 @@
 from typing import Dict, Any
+import asyncio
 import logging
 
 from app.agents.state import AgentState
@@ -7,7 +8,7 @@ from app.services.pdf_service import PDFService
 logger = logging.getLogger(__name__)
 
 
-def pdf_extractor_agent(state: AgentState) -> AgentState:
+async def pdf_extractor_agent(state: AgentState) -> AgentState:
     """
     Agent 1: Extract text and structure from PDF content.
     
@@ -15,24 +16,22 @@ def pdf_extractor_agent(state: AgentState) -> AgentState:
         state: Current agent state
         
     Returns:
-        Updated state with extracted text and sections
+        Updated state with extracted sections
     """
     try:
         logger.info("Starting PDF extraction...")
         
-        # Extract text from PDF
-        extracted_data = PDFService.extract_text_from_pdf(state.pdf_content)
+        # Extract text from PDF; pdfplumber parsing is slow, so keep it off the event loop.
+        # Only the sections are kept; the full text is never assembled
+        state.extracted_sections = await asyncio.to_thread(PDFService.extract_sections, state.pdf_content)
         
-        # Update state with extracted data
-        state.extracted_text = extracted_data["full_text"]
-        state.extracted_sections = extracted_data["sections"]
-        
-        logger.info(f"PDF extraction completed. Extracted {len(state.extracted_text)} characters and {len(state.extracted_sections)} sections")
+        character_count = sum(len(section["text"]) for section in state.extracted_sections)
+        logger.info("PDF extraction completed. Extracted %d characters and %d sections", character_count, len(state.extracted_sections))
         
         return state
         
     except Exception as e:
-        logger.error(f"Error in PDF extractor agent: {e}")
+        logger.error("Error in PDF extractor agent: %s", e)
         state.final_status = "failed"
         state.error_message = f"PDF extraction failed: {str(e)}"
         return state
@@ -1,45 +1,78 @@
-from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from dataclasses import dataclass, field
+from typing import Annotated, BinaryIO, List, Dict, Any, Optional
 from uuid import UUID
 
 
-class AgentState(BaseModel):
-    """Shared state for the LangGraph agent workflow."""
+def _keep_failed(current: str, new: str) -> str:
+    """Reducer for final_status: once a parallel branch fails, the run stays failed."""
+    return current if current == "failed" else new
+
+
+def _keep_first_error(current: Optional[str], new: Optional[str]) -> Optional[str]:
+    """Reducer for error_message: keep the first error reported by any branch."""
+    return current or new
+
+
+@dataclass(slots=True)
+class AgentState:
+    """
+    Shared state for the LangGraph agent workflow.
+    
+    A plain slotted dataclass: LangGraph rebuilds the state before every node,
+    and the state never leaves the trusted agents, so nothing is validated.
+    
+    The menu structurer and UI designer run in parallel and return partial
+    updates; the status fields have reducers so both branches can report a
+    failure in the same step.
+    """
     
     # Input data
-    pdf_content: str = Field(..., description="Base64 encoded PDF content")
-    design_description: Optional[str] = Field(None, description="Optional design description")
-    restaurant_id: UUID = Field(..., description="Restaurant UUID")
+    pdf_content: BinaryIO  # Open binary stream with the PDF content
+    restaurant_id: UUID
+    design_description: Optional[str] = None
     
     # PDF Extraction results
-    extracted_text: str = Field(default="", description="Extracted text from PDF")
-    extracted_sections: List[str] = Field(default_factory=list, description="PDF sections")
+    extracted_sections: List[Dict[str, str]] = field(default_factory=list)  # {title, text} dicts
     
     # Menu Structuring results
-    structured_data: Dict[str, Any] = Field(default_factory=dict, description="Structured menu data")
-    restaurant_name: Optional[str] = Field(default="Restaurant", description="Restaurant name")
-    menu_categories: List[Dict[str, Any]] = Field(default_factory=list, description="Menu categories")
-    restaurant_info: Dict[str, Any] = Field(default_factory=dict, description="Restaurant info")
+    structured_data: Dict[str, Any] = field(default_factory=dict)
+    restaurant_name: Optional[str] = ""  # Empty until the menu is structured; readers fall back to "Restaurant"
+    menu_categories: List[Dict[str, Any]] = field(default_factory=list)
+    restaurant_info: Dict[str, Any] = field(default_factory=dict)
     
     # UI Design results
-    design_system: Dict[str, Any] = Field(default_factory=dict, description="Design system")
-    color_palette: Dict[str, str] = Field(default_factory=dict, description="Color palette")
-    typography: Dict[str, str] = Field(default_factory=dict, description="Typography settings")
-    layout_style: str = Field(default="", description="Layout style")
+    design_system: Dict[str, Any] = field(default_factory=dict)
+    color_palette: Dict[str, str] = field(default_factory=dict)
+    typography: Dict[str, str] = field(default_factory=dict)
+    layout_style: str = ""
     
     # Code Generation results
-    generated_components: List[Dict[str, str]] = Field(default_factory=list, description="Generated components")
-    component_files: List[Dict[str, str]] = Field(default_factory=list, description="Component files")
+    generated_components: List[Dict[str, str]] = field(default_factory=list)
+    component_files: List[Dict[str, str]] = field(default_factory=list)
     
     # Validation results
-    is_valid: bool = Field(default=False, description="Validation status")
-    validation_errors: List[str] = Field(default_factory=list, description="Validation errors")
-    validation_feedback: str = Field(default="", description="Validation feedback")
-    iterations: int = Field(default=0, description="Validation iterations")
+    is_valid: bool = False
+    validation_errors: List[str] = field(default_factory=list)
+    validation_feedback: str = ""
+    iterations: int = 0  # Validation iterations
     
     # Final results
-    final_status: str = Field(default="processing", description="Final status")
-    error_message: Optional[str] = Field(None, description="Error message")
+    final_status: Annotated[str, _keep_failed] = "processing"
+    error_message: Annotated[Optional[str], _keep_first_error] = None
+
+
+def apply_update(state: AgentState, update: Dict[str, Any]) -> AgentState:
+    """
+    Apply a partial state update returned by a graph node outside the graph.
     
-    class Config:
-        arbitrary_types_allowed = True
+    Args:
+        state: State to update in place
+        update: Field values returned by the node
+        
+    Returns:
+        The updated state
+    """
+    for key, value in update.items():
+        setattr(state, key, value)
+    return state
+
@@ -1,38 +1,14 @@
-from typing import Dict, Any
+from typing import Dict, Any, List
 import logging
-import json
-
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, SystemMessage
 
+from app.agents.llm_clients import structured_call
 from app.agents.state import AgentState
-from app.config import settings
+from app.models.schemas import DesignSystemOut
 
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI LLM
-llm = ChatOpenAI(
-    model="gpt-4",
-    api_key=settings.openai_api_key,
-    temperature=0.3
-)
-
-
-def ui_designer_agent(state: AgentState) -> AgentState:
-    """
-    Agent 3: Generate design system and UI specifications.
-    
-    Args:
-        state: Current agent state
-        
-    Returns:
-        Updated state with design system
-    """
-    try:
-        logger.info("Starting UI design...")
-        
-        # Create system prompt for UI design
-        system_prompt = """You are a professional UI/UX designer specializing in modern restaurant websites.
+# System prompt for UI design
+SYSTEM_PROMPT = """You are a professional UI/UX designer specializing in modern restaurant websites.
 
 Your task is to create a beautiful, responsive design system for a restaurant website based on the provided menu data and optional design description.
 
@@ -72,57 +48,83 @@ Return your response as a JSON object with this exact structure:
 Choose colors that work well together and create an appealing, professional look. Use modern web fonts available via Google Fonts.
 Make the design sophisticated and contemporary - avoid generic restaurant website aesthetics."""
 
-        # Prepare context for design
-        restaurant_name = state.restaurant_name or "Restaurant"
-        menu_categories = state.menu_categories or []
-        design_description = state.design_description or ""
-        
-        # Create human message
-        context = f"""
-Restaurant: {restaurant_name}
-Menu Categories: {', '.join([cat.get('name', '') for cat in menu_categories])}
-Design Description: {design_description if design_description else "No specific design requirements - create a modern, sophisticated design"}
-"""
-        
-        human_message = f"Create a design system for this restaurant website:\n\n{context}"
-        
-        # Get LLM response
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=human_message)
-        ]
-        
-        response = llm.invoke(messages)
-        design_data_str = response.content
-        
-        # Parse JSON response
-        try:
-            design_data = json.loads(design_data_str)
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse design JSON response: {e}")
-            # Try to extract JSON from response if it's wrapped in markdown
-            if "```json" in design_data_str:
-                json_start = design_data_str.find("```json") + 7
-                json_end = design_data_str.find("```", json_start)
-                if json_end > json_start:
-                    design_data = json.loads(design_data_str[json_start:json_end])
-                else:
-                    raise e
-            else:
-                raise e
+
+async def ui_designer_agent(state: AgentState) -> Dict[str, Any]:
+    """
+    Agent 3: Generate design system and UI specifications.
+    
+    Runs in parallel with the menu structurer, so the prompt is built from the
+    extracted PDF sections and only the design fields are returned.
+    
+    Args:
+        state: Current agent state
         
-        # Update state with design data
-        state.design_system = design_data.get("design_system", {})
-        state.color_palette = design_data.get("design_system", {})
-        state.typography = design_data.get("typography", {})
-        state.layout_style = design_data.get("layout_style", "modern")
+    Returns:
+        State update with design system
+    """
+    try:
+        logger.info("Starting UI design...")
         
-        logger.info(f"UI design completed. Style: {state.layout_style}")
+        design_output = await structured_call(
+            SYSTEM_PROMPT,
+            _build_human_message(state),
+            DesignSystemOut,
+            temperature=0.3
+        )
         
-        return state
+        return _design_update(design_output)
         
     except Exception as e:
-        logger.error(f"Error in UI designer agent: {e}")
-        state.final_status = "failed"
-        state.error_message = f"UI design failed: {str(e)}"
-        return state
+        logger.error("Error in UI designer agent: %s", e)
+        return _failure_update(e)
+
+
+def _build_human_message(state: AgentState) -> str:
+    """Build the per-restaurant design prompt."""
+    # Prepare context for design; the structured menu may not exist yet, so fall back to the PDF sections
+    restaurant_name = state.restaurant_name or _restaurant_name_hint(state) or "Restaurant"
+    category_names = [cat.get('name', '') for cat in state.menu_categories or []]
+    if not category_names:
+        category_names = [section["title"].title() for section in state.extracted_sections if section["title"]]
+    design_description = state.design_description or ""
+    
+    # Create human message
+    context = f"""
+Restaurant: {restaurant_name}
+Menu Categories: {', '.join(category_names)}
+Design Description: {design_description if design_description else "No specific design requirements - create a modern, sophisticated design"}
+"""
+    
+    return f"Create a design system for this restaurant website:\n\n{context}"
+
+
+def _restaurant_name_hint(state: AgentState) -> str:
+    """Guess the restaurant name from the first line of the untitled PDF preamble."""
+    sections = state.extracted_sections
+    if sections and not sections[0]["title"]:
+        return sections[0]["text"].split("\n", 1)[0].strip()
+    return ""
+
+
+def _design_update(design_output: DesignSystemOut) -> Dict[str, Any]:
+    """Build the state update for the generated design system."""
+    design_data = design_output.model_dump()
+    
+    update = {
+        "design_system": design_data.get("design_system", {}),
+        "color_palette": design_data.get("design_system", {}),
+        "typography": design_data.get("typography", {}),
+        "layout_style": design_data.get("layout_style", "modern"),
+    }
+    
+    logger.info("UI design completed. Style: %s", update['layout_style'])
+    
+    return update
+
+
+def _failure_update(error: Exception) -> Dict[str, Any]:
+    """Build the state update that marks the run as failed after a design error."""
+    return {
+        "final_status": "failed",
+        "error_message": f"UI design failed: {str(error)}",
+    }
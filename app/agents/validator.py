@@ -1,24 +1,61 @@
-from typing import Dict, Any, List
+from functools import lru_cache
+from typing import Dict, Any, List, Tuple
 import logging
-import re
 
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, SystemMessage
+import orjson
+import tiktoken
 
+from app.agents.code_generator import cache_validated_components
+from app.agents.llm_clients import structured_call
 from app.agents.state import AgentState
 from app.config import settings
+from app.models.schemas import CodeReviewOut
+from app.utils.patterns import CLOSE_TAG, EXPORTS, IMPORTS, OPEN_TAG, MarkerScanner, count_matches
 
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI LLM
-llm = ChatOpenAI(
-    model="gpt-4",
-    api_key=settings.openai_api_key,
-    temperature=0.1
-)
+# Files reviewed first so structural problems always fit in the token budget
+_REVIEW_PRIORITY = {"App.jsx": 0, "package.json": 1}
 
+# Substrings the component and router checks look for, matched in one scan
+_MARKERS = MarkerScanner([
+    "import React",
+    "export default",
+    "react-router-dom",
+    "BrowserRouter",
+    "Routes",
+    "Route",
+    "<Router>",
+    "<Routes>",
+    "<BrowserRouter>",
+])
 
-def validator_agent(state: AgentState) -> AgentState:
+# HTML void elements that never have a closing tag
+_VOID_TAGS = frozenset({'img', 'input', 'br', 'hr', 'meta', 'link'})
+
+# System prompt for LLM code review
+SYSTEM_PROMPT = """You are an expert React developer and code reviewer. 
+
+Your task is to validate the generated React code for:
+1. Syntax correctness
+2. Proper React patterns and hooks usage
+3. Correct imports and exports
+4. Proper JSX structure
+5. React Router setup
+6. CSS/styling issues
+7. General code quality
+
+Return your response as JSON:
+{
+    "is_valid": true/false,
+    "errors": ["error1", "error2"],
+    "suggestions": ["suggestion1", "suggestion2"]
+}
+
+Be thorough but focus on critical issues that would prevent the code from running."""
+
+
+async def validator_agent(state: AgentState) -> AgentState:
     """
     Agent 5: Validate generated React code for syntax, imports, and correctness.
     
@@ -48,20 +85,12 @@ def validator_agent(state: AgentState) -> AgentState:
         # Basic validation only - be very lenient to prevent infinite loops
         validation_errors = []
         
-        # Only check for critical issues
-        for component in components:
-            file_path = component.get("file_path", "")
-            code_content = component.get("code", "")
-            
-            # Only check for completely broken files
-            if not code_content or len(code_content.strip()) < 10:
-                validation_errors.append(f"Component {file_path} has no meaningful content")
-        
-        # Check for at least one React component
-        has_react_component = any(
-            comp.get("file_path", "").endswith(".jsx") and "React" in comp.get("code", "")
-            for comp in components
-        )
+        # Only check for critical issues. Each check is a strip and a substring test,
+        # so they run inline; collect errors and look for a React component in one pass
+        has_react_component = False
+        for errors, is_react_component in map(_validate_one, components):
+            validation_errors.extend(errors)
+            has_react_component = has_react_component or is_react_component
         
         if not has_react_component:
             validation_errors.append("No valid React components found")
@@ -73,56 +102,70 @@ def validator_agent(state: AgentState) -> AgentState:
             state.validation_feedback = f"Validation failed: {', '.join(validation_errors)}"
             state.iterations = state.iterations + 1
             
-            logger.warning(f"Validation failed with {len(validation_errors)} errors")
+            logger.warning("Validation failed with %d errors", len(validation_errors))
         else:
             state.is_valid = True
             state.validation_feedback = "Code validation passed successfully!"
             logger.info("Code validation passed")
+            await cache_validated_components(state)
         
         return state
         
     except Exception as e:
-        logger.error(f"Error in validator agent: {e}")
+        logger.error("Error in validator agent: %s", e)
         # On any error, just pass validation to prevent infinite loops
         state.is_valid = True
         state.validation_feedback = f"Validation completed with warning: {str(e)}"
         return state
 
 
+def _validate_one(component: Dict[str, str]) -> Tuple[List[str], bool]:
+    """
+    Check a single component for critical issues.
+    
+    Returns:
+        Errors found, and whether the file is a React component
+    """
+    file_path = component.get("file_path", "")
+    code_content = component.get("code", "")
+    
+    is_react_component = file_path.endswith(".jsx") and "React" in code_content
+    
+    # Only check for completely broken files
+    if not code_content or len(code_content.strip()) < 10:
+        return [f"Component {file_path} has no meaningful content"], is_react_component
+    return [], is_react_component
+
+
 def _validate_component_syntax(file_path: str, code_content: str, component_name: str) -> List[str]:
     """Validate basic syntax of a component."""
     errors = []
     
     # Check for basic React patterns
     if file_path.endswith(".jsx"):
-        if "import React" not in code_content:
+        markers = _MARKERS.scan(code_content)
+        
+        if "import React" not in markers:
             errors.append(f"{component_name}: Missing React import")
         
-        if "export default" not in code_content:
+        if "export default" not in markers:
             errors.append(f"{component_name}: Missing default export")
         
         # Check for JSX syntax issues
         if code_content.count("{") != code_content.count("}"):
             errors.append(f"{component_name}: Mismatched braces in JSX")
         
-        # Check for unclosed tags (basic check)
-        open_tags = re.findall(r'<(\w+)(?:\s[^>]*)?(?<!/)>', code_content)
-        close_tags = re.findall(r'</(\w+)>', code_content)
+        # Check for unclosed tags (basic check), counting opening tags that should have closing tags
+        open_count = sum(1 for match in OPEN_TAG.finditer(code_content) if match.group(1) not in _VOID_TAGS)
+        close_count = count_matches(CLOSE_TAG, code_content)
         
-        # Simple check for self-closing tags
-        self_closing_tags = re.findall(r'<(\w+)(?:\s[^>]*)?/>', code_content)
-        
-        # Count opening tags that should have closing tags
-        non_self_closing = [tag for tag in open_tags if tag not in ['img', 'input', 'br', 'hr', 'meta', 'link']]
-        
-        if len(non_self_closing) != len(close_tags):
+        if open_count != close_count:
             errors.append(f"{component_name}: Possible unclosed JSX tags")
     
     elif file_path.endswith(".json"):
         try:
-            import json
-            json.loads(code_content)
-        except json.JSONDecodeError as e:
+            orjson.loads(code_content)
+        except orjson.JSONDecodeError as e:
             errors.append(f"{component_name}: Invalid JSON syntax - {str(e)}")
     
     elif file_path.endswith(".css"):
@@ -148,26 +191,26 @@ def _validate_react_router_setup(components: List[Dict]) -> List[str]:
         errors.append("App.jsx not found for React Router validation")
         return errors
     
-    app_code = app_component.get("code", "")
+    markers = _MARKERS.scan(app_component.get("code", ""))
     
     # Check for React Router imports
-    if "react-router-dom" not in app_code:
+    if "react-router-dom" not in markers:
         errors.append("App.jsx: Missing react-router-dom import")
     
-    if "BrowserRouter" not in app_code:
+    if "BrowserRouter" not in markers:
         errors.append("App.jsx: Missing BrowserRouter import")
     
-    if "Routes" not in app_code:
+    if "Routes" not in markers:
         errors.append("App.jsx: Missing Routes import")
     
-    if "Route" not in app_code:
+    if "Route" not in markers:
         errors.append("App.jsx: Missing Route import")
     
     # Check for proper router structure
-    if "<Router>" not in app_code and "<BrowserRouter>" not in app_code:
+    if "<Router>" not in markers and "<BrowserRouter>" not in markers:
         errors.append("App.jsx: Missing Router wrapper")
     
-    if "<Routes>" not in app_code:
+    if "<Routes>" not in markers:
         errors.append("App.jsx: Missing Routes component")
     
     return errors
@@ -186,12 +229,12 @@ def _validate_imports_exports(components: List[Dict]) -> List[str]:
         code_content = comp.get("code", "")
         
         # Find exports
-        export_matches = re.findall(r'export\s+(?:default\s+)?(?:function\s+)?(\w+)', code_content)
+        export_matches = EXPORTS.findall(code_content)
         if export_matches:
             exports[file_path] = export_matches
         
         # Find imports
-        import_matches = re.findall(r'import\s+(?:\{([^}]+)\}|\w+)\s+from\s+[\'"]([^\'"]+)[\'"]', code_content)
+        import_matches = IMPORTS.findall(code_content)
         if import_matches:
             imports[file_path] = import_matches
     
@@ -211,59 +254,19 @@ def _validate_imports_exports(components: List[Dict]) -> List[str]:
     return errors
 
 
-def _llm_validate_code(components: List[Dict]) -> Dict[str, Any]:
+async def _llm_validate_code(components: List[Dict]) -> Dict[str, Any]:
     """Use LLM to validate code quality and correctness."""
     try:
-        # Prepare code for LLM validation
-        code_summary = ""
-        for comp in components:
-            file_path = comp.get("file_path", "")
-            code_content = comp.get("code", "")
-            code_summary += f"\n--- {file_path} ---\n{code_content[:1000]}...\n"  # Truncate for token limits
+        # Prepare code for LLM validation, truncated to the token budget
+        code_summary = _build_code_summary(components, settings.llm_validation_token_budget)
         
-        system_prompt = """You are an expert React developer and code reviewer. 
-
-Your task is to validate the generated React code for:
-1. Syntax correctness
-2. Proper React patterns and hooks usage
-3. Correct imports and exports
-4. Proper JSX structure
-5. React Router setup
-6. CSS/styling issues
-7. General code quality
-
-Return your response as JSON:
-{
-    "is_valid": true/false,
-    "errors": ["error1", "error2"],
-    "suggestions": ["suggestion1", "suggestion2"]
-}
-
-Be thorough but focus on critical issues that would prevent the code from running."""
-
         human_message = f"Please validate this React code:\n{code_summary}"
         
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=human_message)
-        ]
-        
-        response = llm.invoke(messages)
-        
-        try:
-            import json
-            validation_result = json.loads(response.content)
-            return validation_result
-        except json.JSONDecodeError:
-            # Fallback if JSON parsing fails
-            return {
-                "is_valid": True,
-                "errors": [],
-                "suggestions": ["LLM validation completed but couldn't parse response"]
-            }
+        review = await structured_call(SYSTEM_PROMPT, human_message, CodeReviewOut, temperature=0.1)
+        return review.model_dump()
     
     except Exception as e:
-        logger.error(f"LLM validation error: {e}")
+        logger.error("LLM validation error: %s", e)
         return {
             "is_valid": True,
             "errors": [],
@@ -271,14 +274,53 @@ Be thorough but focus on critical issues that would prevent the code from runnin
         }
 
 
+@lru_cache(maxsize=1)
+def _get_encoding() -> tiktoken.Encoding:
+    """Get the tokenizer for the configured model."""
+    try:
+        return tiktoken.encoding_for_model(settings.openai_model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def _build_code_summary(components: List[Dict], token_budget: int) -> str:
+    """
+    Concatenate component sources for review, stopping at a token budget.
+    
+    App.jsx and package.json come first; the rest keep their original order.
+    The summary is decoded once, after the budget is spent.
+    
+    Args:
+        components: Generated components
+        token_budget: Maximum number of tokens in the summary
+        
+    Returns:
+        Code summary for the review prompt
+    """
+    encoding = _get_encoding()
+    ordered = sorted(
+        components,
+        key=lambda comp: _REVIEW_PRIORITY.get(comp.get("file_path", "").rsplit("/", 1)[-1], len(_REVIEW_PRIORITY))
+    )
+    
+    tokens: List[int] = []
+    for comp in ordered:
+        remaining = token_budget - len(tokens)
+        if remaining <= 0:
+            break
+        file_tokens = encoding.encode_ordinary(f"\n--- {comp.get('file_path', '')} ---\n{comp.get('code', '')}\n")
+        tokens.extend(file_tokens[:remaining])
+    
+    return encoding.decode(tokens)
+
+
 def _generate_validation_feedback(errors: List[str]) -> str:
     """Generate human-readable validation feedback."""
     if not errors:
         return "Code validation passed successfully!"
     
-    feedback = "Code validation failed with the following issues:\n"
-    for i, error in enumerate(errors, 1):
-        feedback += f"{i}. {error}\n"
-    
-    feedback += "\nPlease fix these issues and regenerate the code."
-    return feedback
+    lines = ["Code validation failed with the following issues:"]
+    lines.extend(f"{i}. {error}" for i, error in enumerate(errors, 1))
+    lines.append("")
+    lines.append("Please fix these issues and regenerate the code.")
+    return "\n".join(lines)
@@ -1,37 +1,24 @@
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Depends, status
+from fastapi import APIRouter, File, UploadFile, Form, HTTPException, Depends, Request, status
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from typing import Optional, List
 import logging
-import base64
+import os
 import uuid
-from contextlib import asynccontextmanager
 
 from app.config import settings
 from app.models.schemas import (
-    ComponentFile, GenerateResponse, RestaurantCreate, RestaurantWithCodeResponse, RestaurantListResponse
+    GenerateResponse, RestaurantCreate, RestaurantWithCodeResponse, RestaurantListResponse
 )
 from app.graph.workflow import run_menu_generation_workflow
 
 logger = logging.getLogger(__name__)
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """Application lifespan handler."""
-    logger.info("Menu2Site AI starting up...")
-    yield
-    logger.info("Menu2Site AI shutting down...")
-
-# Create FastAPI app
-app = FastAPI(
-    title=settings.app_name,
-    version=settings.app_version,
-    description="Agentic AI backend that converts restaurant menu PDFs to React websites",
-    lifespan=lifespan
-)
+# API routes, mounted on the application in app.main
+router = APIRouter()
 
 
-@app.get("/")
+@router.get("/")
 async def root():
     """Root endpoint."""
     return {
@@ -41,14 +28,15 @@ async def root():
     }
 
 
-@app.get("/health")
+@router.get("/health")
 async def health_check():
     """Health check endpoint."""
     return {"status": "healthy", "service": settings.app_name}
 
 
-@app.post("/api/generate", response_model=GenerateResponse)
+@router.post("/api/generate", response_model=GenerateResponse)
 async def generate_website(
+    request: Request,
     pdf_file: UploadFile = File(..., description="Restaurant menu PDF file"),
     design_description: Optional[str] = Form(None, description="Optional design description")
 ):
@@ -56,6 +44,7 @@ async def generate_website(
     Generate a React website from a restaurant menu PDF.
     
     Args:
+        request: Incoming request, used to reach the shared workflow
         pdf_file: Uploaded PDF file
         design_description: Optional design description
         
@@ -64,35 +53,33 @@ async def generate_website(
     """
     try:
         # Validate file type
-        if not pdf_file.filename.lower().endswith('.pdf'):
+        stem, extension = os.path.splitext(pdf_file.filename or "")
+        if extension.lower() != '.pdf':
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="File must be a PDF"
             )
         
-        # Read and encode PDF content
-        pdf_content_bytes = await pdf_file.read()
-        pdf_content_b64 = base64.b64encode(pdf_content_bytes).decode('utf-8')
-        
         # Generate restaurant name from filename
-        restaurant_name = pdf_file.filename.replace('.pdf', '').replace('_', ' ').title()
+        restaurant_name = stem.replace('_', ' ').title()
         
         # Generate unique restaurant ID
-        restaurant_id = uuid.uuid4()
+        restaurant_id = uuid.UUID(bytes=os.urandom(16), version=4)
         
-        logger.info(f"Processing PDF for restaurant: {restaurant_name}")
+        logger.info("Processing PDF for restaurant: %s", restaurant_name)
         
         # Run the workflow
         workflow_result = await run_menu_generation_workflow(
-            pdf_content=pdf_content_b64,
+            pdf_content=pdf_file.file,  # Spooled upload, read directly by the PDF extractor
             design_description=design_description,
-            restaurant_id=str(restaurant_id)
+            restaurant_id=restaurant_id,
+            workflow=request.app.state.workflow
         )
         
         # Check workflow result
         if workflow_result["final_status"] == "failed":
             error_msg = workflow_result.get("error_message", "Unknown error")
-            logger.error(f"Workflow failed for restaurant {restaurant_id}: {error_msg}")
+            logger.error("Workflow failed for restaurant %s: %s", restaurant_id, error_msg)
             
             return GenerateResponse(
                 restaurant_id=restaurant_id,
@@ -100,35 +87,21 @@ async def generate_website(
                 error_message=error_msg
             )
         
-        # Get generated components
-        components = workflow_result.get("component_files", [])
+        # Validate the generated components in one pass; invalid ones are dropped by the schema
+        response = GenerateResponse.model_validate({
+            "restaurant_id": restaurant_id,
+            "status": "completed",
+            "components": workflow_result.get("component_files", [])
+        })
         
-        # Format response with Pydantic validation
-        response_components = []
-        for component in components:
-            try:
-                component_file = ComponentFile(
-                    file_path=component["file_path"],
-                    code=component["code"],
-                    component_name=component.get("component_name", "Unknown")
-                )
-                response_components.append(component_file)
-            except Exception as e:
-                logger.warning(f"Invalid component data: {e}")
-                continue
+        logger.info("Successfully generated %d components for %s", len(response.components), restaurant_name)
         
-        logger.info(f"Successfully generated {len(response_components)} components for {restaurant_name}")
-        
-        return GenerateResponse(
-            restaurant_id=restaurant_id,
-            status="completed",
-            components=response_components
-        )
+        return response
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error in generate_website: {e}")
+        logger.error("Error in generate_website: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal server error: {str(e)}"
@@ -138,12 +111,3 @@ async def generate_website(
 # Database-dependent endpoints removed for simplicity
 # The main functionality is PDF to React code generation
 
-
-if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(
-        "app.main:app",
-        host=settings.host,
-        port=settings.port,
-        reload=settings.debug
-    )
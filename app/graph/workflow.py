@@ -1,8 +1,12 @@
 from langgraph.graph import StateGraph, END
-from typing import Dict, Any
+from functools import lru_cache
+from typing import BinaryIO, Dict, Any, List, Optional
+import asyncio
 import logging
+from uuid import UUID
 
-from app.agents.state import AgentState
+from app.agents.llm_clients import aclose_http_clients
+from app.agents.state import AgentState, apply_update
 from app.agents.pdf_extractor import pdf_extractor_agent
 from app.agents.menu_structurer import menu_structurer_agent
 from app.agents.ui_designer import ui_designer_agent
@@ -11,6 +15,33 @@ from app.agents.validator import validator_agent
 
 logger = logging.getLogger(__name__)
 
+# State fields returned to the API; everything else stays inside the workflow
+_RESULT_FIELDS = (
+    "restaurant_id",
+    "restaurant_name",
+    "final_status",
+    "error_message",
+    "is_valid",
+    "validation_feedback",
+    "component_files",
+    "generated_components",
+)
+
+
+def _workflow_result(final_state: Any) -> Dict[str, Any]:
+    """
+    Pick the fields the API needs from a final workflow state.
+    
+    Args:
+        final_state: AgentState, or the dict of channel values returned by the graph
+        
+    Returns:
+        Dictionary with only the result fields
+    """
+    if isinstance(final_state, AgentState):
+        return {key: getattr(final_state, key) for key in _RESULT_FIELDS}
+    return {key: final_state.get(key) for key in _RESULT_FIELDS}
+
 
 def should_continue_validation(state: AgentState) -> str:
     """
@@ -30,17 +61,21 @@ def should_continue_validation(state: AgentState) -> str:
         logger.info("Validation passed, ending workflow")
         return "end"
     elif iterations < max_iterations:
-        logger.info(f"Validation failed, regenerating code (iteration {iterations + 1}/{max_iterations})")
+        logger.info("Validation failed, regenerating code (iteration %d/%d)", iterations + 1, max_iterations)
         return "regenerate"
     else:
-        logger.warning(f"Max validation iterations ({max_iterations}) reached, ending workflow")
+        logger.warning("Max validation iterations (%d) reached, ending workflow", max_iterations)
         return "end"
 
 
+@lru_cache(maxsize=1)
 def create_menu_generation_workflow() -> StateGraph:
     """
     Create the LangGraph workflow for menu to React website generation.
     
+    The graph is compiled on the first call and shared afterwards; the app
+    lifespan calls this once at startup.
+    
     Returns:
         Compiled StateGraph workflow
     """
@@ -57,10 +92,11 @@ def create_menu_generation_workflow() -> StateGraph:
     # Set entry point
     workflow.set_entry_point("extract_pdf")
     
-    # Add linear edges
+    # Menu structuring and UI design only depend on the extracted PDF, so they
+    # run in parallel and code generation waits for both
     workflow.add_edge("extract_pdf", "structure_menu")
-    workflow.add_edge("structure_menu", "design_ui")
-    workflow.add_edge("design_ui", "generate_code")
+    workflow.add_edge("extract_pdf", "design_ui")
+    workflow.add_edge(["structure_menu", "design_ui"], "generate_code")
     workflow.add_edge("generate_code", "validate")
     
     # Add conditional edge from validator
@@ -83,86 +119,63 @@ def create_menu_generation_workflow() -> StateGraph:
     return compiled_workflow
 
 
-# Global workflow instance
-menu_workflow = create_menu_generation_workflow()
-
-
 async def run_menu_generation_workflow(
-    pdf_content: str,
+    pdf_content: BinaryIO,
     design_description: str = None,
-    restaurant_id: str = None
+    restaurant_id: Optional[UUID] = None,
+    workflow: Optional[StateGraph] = None
 ) -> Dict[str, Any]:
     """
     Run the complete menu generation workflow.
     
     Args:
-        pdf_content: Base64 encoded PDF content
+        pdf_content: Open binary stream with the PDF content
         design_description: Optional design description
         restaurant_id: Restaurant ID for tracking
+        workflow: Compiled workflow to run, defaults to the shared one
         
     Returns:
-        Final workflow state
+        Result fields of the final workflow state
     """
     try:
-        logger.info(f"Starting menu generation workflow for restaurant {restaurant_id}")
+        logger.info("Starting menu generation workflow for restaurant %s", restaurant_id)
         
         # Initialize state
         initial_state = AgentState(
             pdf_content=pdf_content,
-            design_description=design_description,
             restaurant_id=restaurant_id,
-            extracted_text="",
-            extracted_sections=[],
-            structured_data={},
-            restaurant_name="",
-            menu_categories=[],
-            restaurant_info={},
-            design_system={},
-            color_palette={},
-            typography={},
-            layout_style="",
-            generated_components=[],
-            component_files=[],
-            is_valid=False,
-            validation_errors=[],
-            validation_feedback="",
-            iterations=0,
-            final_status="processing",
-            error_message=None
+            design_description=design_description
         )
         
         # Run the workflow with recursion limit handling
         try:
-            final_state = await menu_workflow.ainvoke(initial_state)
+            final_state = await (workflow or create_menu_generation_workflow()).ainvoke(initial_state)
         except Exception as recursion_error:
             if "recursion limit" in str(recursion_error).lower():
-                logger.warning(f"Recursion limit reached, bypassing validation and returning generated code")
+                logger.warning("Recursion limit reached, bypassing validation and returning generated code")
                 # Run workflow without validation loop
                 final_state = await run_workflow_without_validation(initial_state)
             else:
                 raise recursion_error
         
-        # Handle both AgentState objects and dictionaries
-        if hasattr(final_state, 'dict'):
-            final_state_dict = final_state.dict()
-        else:
-            final_state_dict = final_state
+        # Only the result fields are copied out of the final state
+        result = _workflow_result(final_state)
         
         # Determine final status
-        if final_state_dict.get("final_status") == "failed":
-            logger.error(f"Workflow failed: {final_state_dict.get('error_message')}")
-        elif final_state_dict.get("is_valid") or final_state_dict.get("generated_components"):
-            final_state_dict["final_status"] = "completed"
+        if result["final_status"] == "failed":
+            logger.error("Workflow failed: %s", result['error_message'])
+        elif result["is_valid"] or result["generated_components"]:
+            result["final_status"] = "completed"
             logger.info("Workflow completed successfully")
         else:
-            final_state_dict["final_status"] = "failed"
-            final_state_dict["error_message"] = "No code generated"
+            result["final_status"] = "failed"
+            result["error_message"] = "No code generated"
             logger.error("Workflow failed - no code generated")
         
-        return final_state_dict
+        return result
         
     except Exception as e:
-        logger.error(f"Error running menu generation workflow: {e}")
+        logger.error("Error running menu generation workflow: %s", e)
         return {
             "final_status": "failed",
             "error_message": str(e),
@@ -170,6 +183,52 @@ async def run_menu_generation_workflow(
         }
 
 
+async def run_pipeline(states: List[AgentState], max_async: int = 4) -> List[Dict[str, Any]]:
+    """
+    Run the workflow for several restaurants concurrently.
+    
+    Every agent is I/O-bound on OpenAI, so the pipelines share one event loop
+    and finish in roughly the time of the slowest one instead of the sum. Each
+    one goes through run_menu_generation_workflow, including its fallback
+    when the validation loop hits the recursion limit.
+    
+    Args:
+        states: Initial agent states, one per restaurant; only their input fields are used
+        max_async: Maximum number of pipelines running at the same time
+        
+    Returns:
+        Result fields of each final workflow state, in the same order as the input states
+    """
+    semaphore = asyncio.Semaphore(max_async)
+    workflow = create_menu_generation_workflow()
+    
+    async def _run(state: AgentState) -> Dict[str, Any]:
+        async with semaphore:
+            return await run_menu_generation_workflow(
+                pdf_content=state.pdf_content,
+                design_description=state.design_description,
+                restaurant_id=state.restaurant_id,
+                workflow=workflow
+            )
+    
+    async with asyncio.TaskGroup() as task_group:
+        tasks = [task_group.create_task(_run(state)) for state in states]
+    
+    return [task.result() for task in tasks]
+
+
+def run_pipeline_sync(states: List[AgentState], max_async: int = 4) -> List[Dict[str, Any]]:
+    """Synchronous wrapper around run_pipeline for callers without an event loop."""
+    async def _run() -> List[Dict[str, Any]]:
+        try:
+            return await run_pipeline(states, max_async=max_async)
+        finally:
+            # The loop is closed afterwards; its OpenAI connections would otherwise keep it alive
+            await aclose_http_clients()
+    
+    return asyncio.run(_run())
+
+
 async def run_workflow_without_validation(initial_state: AgentState) -> AgentState:
     """Run workflow without validation loop to bypass recursion issues."""
     try:
@@ -179,22 +238,22 @@ async def run_workflow_without_validation(initial_state: AgentState) -> AgentSta
         state = initial_state
         
         # PDF Extraction
-        state = pdf_extractor_agent(state)
+        state = await pdf_extractor_agent(state)
         if state.final_status == "failed":
             return state
         
-        # Menu Structuring
-        state = menu_structurer_agent(state)
-        if state.final_status == "failed":
-            return state
-        
-        # UI Design
-        state = ui_designer_agent(state)
+        # Menu Structuring and UI Design, concurrently
+        menu_update, design_update = await asyncio.gather(
+            menu_structurer_agent(state),
+            ui_designer_agent(state)
+        )
+        apply_update(state, design_update)
+        apply_update(state, menu_update)
         if state.final_status == "failed":
             return state
         
         # Code Generation
-        state = code_generator_agent(state)
+        state = await code_generator_agent(state)
         if state.final_status == "failed":
             return state
         
@@ -209,10 +268,10 @@ async def run_workflow_without_validation(initial_state: AgentState) -> AgentSta
             state.final_status = "failed"
         
         logger.info("Workflow completed without validation")
-        return state.dict()
+        return state
         
     except Exception as e:
-        logger.error(f"Error in workflow without validation: {e}")
+        logger.error("Error in workflow without validation: %s", e)
         initial_state.final_status = "failed"
         initial_state.error_message = str(e)
-        return initial_state.dict()
+        return initial_state
@@ -1,9 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from contextlib import asynccontextmanager
 import logging
 
 from app.config import settings
-from app.api.routes import app as routes_app
+from app.agents.llm_clients import aclose_http_clients
+from app.api.routes import router
+from app.graph.workflow import create_menu_generation_workflow
+from app.services.db_service import dispose_engine
 
 # Configure logging
 logging.basicConfig(
@@ -13,13 +18,27 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application lifespan handler."""
+    logger.info("%s starting up...", settings.app_name)
+    app.state.workflow = create_menu_generation_workflow()
+    yield
+    logger.info("%s shutting down...", settings.app_name)
+    await aclose_http_clients()
+    dispose_engine()
+
+
 # Create FastAPI app
 app = FastAPI(
     title=settings.app_name,
     version=settings.app_version,
     description="Agentic AI backend that converts restaurant menu PDFs to React websites",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,  # Generated code can be large; orjson escapes it much faster
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -32,6 +51,16 @@ app.add_middleware(
 )
 
 # Include routes
-app.include_router(routes_app.router)
+app.include_router(router)
+
+logger.info("%s v%s initialized successfully", settings.app_name, settings.app_version)
+
 
-logger.info(f"{settings.app_name} v{settings.app_version} initialized successfully")
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(
+        "app.main:app",
+        host=settings.host,
+        port=settings.port,
+        reload=settings.debug
+    )
@@ -1,9 +1,8 @@
-from sqlalchemy import Column, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, String, DateTime, Text, ForeignKey, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-import uuid
 
 Base = declarative_base()
 
@@ -13,7 +12,7 @@ class Restaurant(Base):
     
     __tablename__ = "restaurants"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))  # Generated by Postgres 13+
     name = Column(String(255), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     pdf_content = Column(Text, nullable=False)  # Store PDF as text/base64
@@ -27,8 +26,12 @@ class GeneratedCode(Base):
     """Generated React code components for restaurants."""
     
     __tablename__ = "generated_code"
+    __table_args__ = (
+        # Serves lookups by restaurant as well as per-restaurant ordering by creation time
+        Index("ix_generated_code_restaurant_id_created_at", "restaurant_id", "created_at"),
+    )
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()"))
     restaurant_id = Column(UUID(as_uuid=True), ForeignKey("restaurants.id"), nullable=False)
     component_name = Column(String(255), nullable=False)  # e.g., "App.jsx", "Menu.jsx"
     code_content = Column(Text, nullable=False)
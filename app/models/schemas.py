@@ -1,14 +1,17 @@
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, model_validator, validator
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from uuid import UUID
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 class ComponentFile(BaseModel):
     """Schema for individual component file."""
     file_path: str = Field(..., description="Relative file path", min_length=1)
     code: str = Field(..., description="File content", min_length=1)
-    component_name: str = Field(..., description="Component name", min_length=1)
+    component_name: str = Field("Unknown", description="Component name", min_length=1)
     
     @validator('file_path')
     def validate_file_path(cls, v):
@@ -76,6 +79,25 @@ class GenerateResponse(BaseModel):
     components: List[ComponentFile] = Field(default_factory=list, description="Generated React components")
     error_message: Optional[str] = Field(None, description="Error message if failed")
     
+    @model_validator(mode='before')
+    @classmethod
+    def drop_invalid_components(cls, data: Any) -> Any:
+        """Drop components that would fail validation so the rest of the response still validates."""
+        if isinstance(data, dict) and data.get("components"):
+            components = [
+                component for component in data["components"]
+                if not isinstance(component, dict) or (
+                    (component.get("file_path") or "").strip()
+                    and (component.get("code") or "").strip()
+                    and component.get("component_name", "Unknown")
+                )
+            ]
+            dropped = len(data["components"]) - len(components)
+            if dropped:
+                logger.warning("Dropped %d invalid components from the response", dropped)
+            data = {**data, "components": components}
+        return data
+    
     @validator('status')
     def validate_status(cls, v):
         allowed_statuses = ['processing', 'completed', 'failed']
@@ -88,3 +110,91 @@ class RestaurantListResponse(BaseModel):
     """Schema for restaurant list response."""
     restaurants: List[RestaurantResponse]
     total: int = Field(..., ge=0, description="Total number of restaurants")
+
+
+# LLM structured output schemas
+
+class MenuItemOut(BaseModel):
+    """Menu item extracted by the menu structurer."""
+    name: str
+    description: Optional[str]
+    price: Optional[str]
+
+
+class MenuCategoryOut(BaseModel):
+    """Menu category extracted by the menu structurer."""
+    name: str
+    items: List[MenuItemOut]
+
+
+class RestaurantInfoOut(BaseModel):
+    """Restaurant information extracted by the menu structurer."""
+    address: Optional[str]
+    phone: Optional[str]
+    hours: Optional[str]
+    about: Optional[str]
+    website: Optional[str]
+
+
+class MenuStructureOut(BaseModel):
+    """Structured output of the menu structurer agent."""
+    restaurant_name: Optional[str]
+    menu_categories: List[MenuCategoryOut]
+    restaurant_info: RestaurantInfoOut
+
+
+class ColorPaletteOut(BaseModel):
+    """Color palette produced by the UI designer."""
+    primary_color: str
+    secondary_color: str
+    accent_color: str
+    background_color: str
+    text_color: str
+    text_secondary: str
+
+
+class TypographyOut(BaseModel):
+    """Typography settings produced by the UI designer."""
+    heading_font: str
+    body_font: str
+    heading_size: str
+    body_size: str
+    small_size: str
+
+
+class ComponentStylesOut(BaseModel):
+    """Component style choices produced by the UI designer."""
+    button_style: str
+    card_style: str
+    navigation_style: str
+
+
+class SpacingOut(BaseModel):
+    """Spacing scale produced by the UI designer."""
+    small: str
+    medium: str
+    large: str
+    xl: str
+
+
+class DesignSystemOut(BaseModel):
+    """Structured output of the UI designer agent."""
+    design_system: ColorPaletteOut
+    typography: TypographyOut
+    layout_style: str
+    component_styles: ComponentStylesOut
+    spacing: SpacingOut
+
+
+class GeneratedFileOut(BaseModel):
+    """Single file produced by the code generator."""
+    file_path: str
+    code: str
+    component_name: str = "Unknown"
+
+
+class CodeReviewOut(BaseModel):
+    """Structured output of the LLM code review."""
+    is_valid: bool
+    errors: List[str]
+    suggestions: List[str]
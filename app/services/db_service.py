@@ -1,7 +1,7 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, insert, text
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.exc import SQLAlchemyError
-from typing import List, Optional, Dict
+from typing import Iterator, List, Optional, Dict
 from uuid import UUID
 import logging
 
@@ -11,8 +11,17 @@ from app.models.schemas import RestaurantCreate, GeneratedCodeResponse
 
 logger = logging.getLogger(__name__)
 
-# Database engine and session
-engine = create_engine(settings.database_url, echo=settings.debug)
+# Database engine with a bounded, health-checked connection pool
+engine = create_engine(
+    settings.database_url,
+    echo=settings.debug,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_recycle=settings.db_pool_recycle,
+    pool_pre_ping=True
+)
+
+# Sessions are request-scoped: each SessionManager creates and closes its own
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
@@ -22,17 +31,52 @@ def create_tables():
         Base.metadata.create_all(bind=engine)
         logger.info("Database tables created successfully")
     except SQLAlchemyError as e:
-        logger.error(f"Error creating database tables: {e}")
+        logger.error("Error creating database tables: %s", e)
         raise
 
 
-def get_db() -> Session:
+class SessionManager:
+    """
+    Context manager owning one database session.
+    
+    The session is kept on the manager rather than looked up per thread, since
+    FastAPI may enter and exit a dependency on different threadpool threads.
+    It is rolled back on error and closed on exit, which returns its
+    connection to the pool.
+    
+    No endpoint is database-backed yet; routes should depend on get_db, and
+    scripts can use the manager directly:
+    
+        with SessionManager() as db:
+            DatabaseService(db).get_all_restaurants()
+    """
+    
+    def __init__(self):
+        self.session: Optional[Session] = None
+    
+    def __enter__(self) -> Session:
+        self.session = SessionLocal()
+        return self.session
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        try:
+            if exc_type is not None:
+                self.session.rollback()
+        finally:
+            self.session.close()
+            self.session = None
+
+
+def get_db() -> Iterator[Session]:
     """Get database session."""
-    db = SessionLocal()
-    try:
+    with SessionManager() as db:
         yield db
-    finally:
-        db.close()
+
+
+def dispose_engine():
+    """Close every pooled database connection."""
+    engine.dispose()
+    logger.info("Database connection pool disposed")
 
 
 class DatabaseService:
@@ -52,11 +96,11 @@ class DatabaseService:
             self.db.add(restaurant)
             self.db.commit()
             self.db.refresh(restaurant)
-            logger.info(f"Created restaurant: {restaurant.id}")
+            logger.info("Created restaurant: %s", restaurant.id)
             return restaurant
         except SQLAlchemyError as e:
             self.db.rollback()
-            logger.error(f"Error creating restaurant: {e}")
+            logger.error("Error creating restaurant: %s", e)
             raise
     
     def get_restaurant(self, restaurant_id: UUID) -> Optional[Restaurant]:
@@ -64,7 +108,7 @@ class DatabaseService:
         try:
             return self.db.query(Restaurant).filter(Restaurant.id == restaurant_id).first()
         except SQLAlchemyError as e:
-            logger.error(f"Error getting restaurant {restaurant_id}: {e}")
+            logger.error("Error getting restaurant %s: %s", restaurant_id, e)
             raise
     
     def get_all_restaurants(self, skip: int = 0, limit: int = 100) -> List[Restaurant]:
@@ -72,29 +116,31 @@ class DatabaseService:
         try:
             return self.db.query(Restaurant).offset(skip).limit(limit).all()
         except SQLAlchemyError as e:
-            logger.error(f"Error getting restaurants: {e}")
+            logger.error("Error getting restaurants: %s", e)
             raise
     
     def save_generated_code(self, restaurant_id: UUID, components: List[Dict[str, str]]) -> List[GeneratedCode]:
         """Save generated React components to database."""
         try:
-            generated_codes = []
-            for component in components:
-                generated_code = GeneratedCode(
-                    restaurant_id=restaurant_id,
-                    component_name=component.get("component_name", "Unknown"),
-                    code_content=component["code"],
-                    file_path=component["file_path"]
-                )
-                generated_codes.append(generated_code)
-                self.db.add(generated_code)
+            rows = [
+                {
+                    "restaurant_id": restaurant_id,
+                    "component_name": component.get("component_name", "Unknown"),
+                    "code_content": component["code"],
+                    "file_path": component["file_path"]
+                }
+                for component in components
+            ]
+            
+            # One bulk INSERT ... RETURNING instead of a flush per ORM object
+            generated_codes = self.db.scalars(insert(GeneratedCode).returning(GeneratedCode), rows).all() if rows else []
             
             self.db.commit()
-            logger.info(f"Saved {len(generated_codes)} components for restaurant {restaurant_id}")
+            logger.info("Saved %d components for restaurant %s", len(generated_codes), restaurant_id)
             return generated_codes
         except SQLAlchemyError as e:
             self.db.rollback()
-            logger.error(f"Error saving generated code: {e}")
+            logger.error("Error saving generated code: %s", e)
             raise
     
     def get_generated_code(self, restaurant_id: UUID) -> List[GeneratedCode]:
@@ -102,7 +148,7 @@ class DatabaseService:
         try:
             return self.db.query(GeneratedCode).filter(GeneratedCode.restaurant_id == restaurant_id).all()
         except SQLAlchemyError as e:
-            logger.error(f"Error getting generated code for restaurant {restaurant_id}: {e}")
+            logger.error("Error getting generated code for restaurant %s: %s", restaurant_id, e)
             raise
     
     def update_restaurant_status(self, restaurant_id: UUID, status: str, error_message: Optional[str] = None):
@@ -1,11 +1,36 @@
 import pdfplumber
-import base64
 import io
-from typing import Dict, List, Optional
+import re
+from array import array
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
 import logging
 
+try:
+    # SIMD base64 codec with the same API as the stdlib module
+    import pybase64 as base64
+except ImportError:
+    import base64
+
 logger = logging.getLogger(__name__)
 
+# Common section headers for restaurant menus, each on a line of its own. The
+# trailing newline is a lookahead so back-to-back headers both match.
+_SECTION_RE = re.compile(
+    r'\n\s*(?:'
+    r'APPETIZERS?|STARTERS?|ANTIPASTI|'
+    r'MAIN\s*COURSES?|ENTRÉES?|MAINS?|'
+    r'DESSERTS?|DOLCI|'
+    r'BEVERAGES?|DRINKS?|BEVANDE|'
+    r'SALADS?|INSALATE|'
+    r'SOUPS?|ZUPPE|'
+    r'PASTAS?|'
+    r'PIZZAS?|'
+    r'SANDWICHES?|PANINI|'
+    r'SPECIALS?|SPECIALITIES?'
+    r')\s*(?=\n)',
+    re.IGNORECASE
+)
+
 
 class PDFService:
     """Service for PDF processing operations."""
@@ -13,7 +38,10 @@ class PDFService:
     @staticmethod
     def extract_text_from_pdf(pdf_content: str) -> Dict[str, any]:
         """
-        Extract text and structure from PDF content.
+        Extract text and structure from base64 encoded PDF content.
+        
+        Keeps every page, table and the full text in memory; the agents use
+        extract_sections instead.
         
         Args:
             pdf_content: Base64 encoded PDF content
@@ -23,99 +51,182 @@ class PDFService:
         """
         try:
             # Decode base64 PDF content
-            pdf_bytes = base64.b64decode(pdf_content)
-            pdf_file = io.BytesIO(pdf_bytes)
+            pdf_bytes = base64.b64decode(pdf_content, validate=False)
             
+            # Tables are stored column-wise: entry i of each list describes the same table
             extracted_data = {
                 "full_text": "",
                 "pages": [],
-                "tables": [],
+                "tables": {
+                    "page_numbers": array('I'),
+                    "table_numbers": array('I'),
+                    "data": []
+                },
                 "sections": []
             }
+            tables = extracted_data["tables"]
             
-            with pdfplumber.open(pdf_file) as pdf:
-                for page_num, page in enumerate(pdf.pages):
-                    # Extract text
-                    page_text = page.extract_text()
-                    if page_text:
-                        extracted_data["full_text"] += page_text + "\n"
-                        extracted_data["pages"].append({
-                            "page_number": page_num + 1,
-                            "text": page_text
-                        })
-                    
-                    # Extract tables
-                    tables = page.extract_tables()
-                    for table_num, table in enumerate(tables):
-                        if table:
-                            extracted_data["tables"].append({
-                                "page_number": page_num + 1,
-                                "table_number": table_num + 1,
-                                "data": table
-                            })
+            for page in PDFService.iter_pages(io.BytesIO(pdf_bytes)):
+                if page["text"]:
+                    extracted_data["pages"].append({
+                        "page_number": page["page_number"],
+                        "text": page["text"]
+                    })
+                
+                for table_num, table in enumerate(page["tables"], 1):
+                    tables["page_numbers"].append(page["page_number"])
+                    tables["table_numbers"].append(table_num)
+                    tables["data"].append(table)
+            
+            page_texts = [page["text"] for page in extracted_data["pages"]]
+            if page_texts:
+                extracted_data["full_text"] = "\n".join(page_texts) + "\n"
             
             # Split into sections based on common patterns
-            sections = PDFService._split_into_sections(extracted_data["full_text"])
-            extracted_data["sections"] = sections
+            extracted_data["sections"] = [
+                {"title": title, "text": section_text}
+                for title, section_text in PDFService.iter_sections(page_texts)
+            ]
             
-            logger.info(f"Extracted text from PDF: {len(extracted_data['full_text'])} characters, {len(sections)} sections")
+            logger.info("Extracted text from PDF: %d characters, %d sections", len(extracted_data['full_text']), len(extracted_data['sections']))
             return extracted_data
             
         except Exception as e:
-            logger.error(f"Error extracting text from PDF: {e}")
+            logger.error("Error extracting text from PDF: %s", e)
             raise
     
     @staticmethod
-    def _split_into_sections(text: str) -> List[str]:
+    def extract_sections(pdf_file: BinaryIO) -> List[Dict[str, str]]:
         """
-        Split text into logical sections based on common patterns.
+        Extract the menu sections from an open binary PDF stream.
+        
+        Pages are parsed and released one at a time, and the section scanner
+        only holds the section it is currently reading.
         
         Args:
-            text: Full extracted text
+            pdf_file: Seekable binary file object with the PDF content
             
         Returns:
-            List of text sections
+            Sections as {"title", "text"} dicts
+        """
+        try:
+            page_texts = (
+                page["text"]
+                for page in PDFService.iter_pages(pdf_file, with_tables=False)
+                if page["text"]
+            )
+            sections = [
+                {"title": title, "text": section_text}
+                for title, section_text in PDFService.iter_sections(page_texts)
+            ]
+            
+            logger.info("Extracted %d sections from PDF", len(sections))
+            return sections
+            
+        except Exception as e:
+            logger.error("Error extracting sections from PDF: %s", e)
+            raise
+    
+    @staticmethod
+    def iter_pages(pdf_file: BinaryIO, with_tables: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Parse a PDF one page at a time.
+        
+        Each page's layout cache is released before the next page is parsed,
+        so only one page is held in memory at once.
+        
+        Args:
+            pdf_file: Seekable binary file object with the PDF content
+            with_tables: Whether to also extract tables, which is slow
+            
+        Yields:
+            Dicts with "page_number", "text" and "tables"
         """
-        sections = []
+        pdf_file.seek(0)
         
-        # Common section patterns for restaurant menus
-        section_patterns = [
-            r'\n\s*(?:APPETIZERS?|STARTERS?|ANTIPASTI)\s*\n',
-            r'\n\s*(?:MAIN\s*COURSES?|ENTRÉES?|MAINS?)\s*\n',
-            r'\n\s*(?:DESSERTS?|DOLCI)\s*\n',
-            r'\n\s*(?:BEVERAGES?|DRINKS?|BEVANDE)\s*\n',
-            r'\n\s*(?:SALADS?|INSALATE)\s*\n',
-            r'\n\s*(?:SOUPS?|ZUPPE)\s*\n',
-            r'\n\s*(?:PASTA|PASTAS?)\s*\n',
-            r'\n\s*(?:PIZZA|PIZZAS?)\s*\n',
-            r'\n\s*(?:SANDWICHES?|PANINI)\s*\n',
-            r'\n\s*(?:SPECIALS?|SPECIALITIES?)\s*\n',
-        ]
+        with pdfplumber.open(pdf_file) as pdf:
+            for page_num, page in enumerate(pdf.pages):
+                try:
+                    yield {
+                        "page_number": page_num + 1,
+                        "text": page.extract_text() or "",
+                        "tables": PDFService._extract_tables(page) if with_tables else []
+                    }
+                finally:
+                    page.close()
+    
+    @staticmethod
+    def _extract_tables(page: pdfplumber.page.Page) -> List[List[List[Optional[str]]]]:
+        """
+        Extract the non-empty tables of a page.
         
-        import re
+        Table detection and cell extraction are separate passes; most menu
+        pages are plain text, so cells are only rebuilt once a table is found.
+        
+        Args:
+            page: Open pdfplumber page
+            
+        Returns:
+            Rows of cell values for each table
+        """
+        found = page.find_tables()
+        if not found:
+            return []
+        return [data for data in (table.extract() for table in found) if data]
+    
+    @staticmethod
+    def iter_sections(page_texts: Iterable[str]) -> Iterator[Tuple[str, str]]:
+        """
+        Split page texts into logical sections based on common patterns.
         
-        # Find all section headers
-        section_headers = []
-        for pattern in section_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                section_headers.append((match.start(), match.group().strip()))
+        Pages are scanned as they arrive, and each section is yielded as soon
+        as the next header is found. Text before the first section header
+        (usually the restaurant name and details) is yielded as an untitled
+        section. If no header is found at all, the text is split on blank lines
+        instead.
         
-        # Sort by position
-        section_headers.sort(key=lambda x: x[0])
+        Args:
+            page_texts: Text of each page, in order
+            
+        Yields:
+            (section_title, section_text) tuples; the title is empty when the
+            text has no recognizable section headers
+        """
+        title = None  # None until the first header is seen
+        parts: List[str] = []
+        first_page = True
         
-        # Extract sections
-        if section_headers:
-            for i, (start, header) in enumerate(section_headers):
-                end = section_headers[i + 1][0] if i + 1 < len(section_headers) else len(text)
-                section_text = text[start:end].strip()
+        for page_text in page_texts:
+            # Headers start at a newline, which for every page but the first is
+            # the one ending the previous page; it is prepended for the scan
+            # but skipped when the text is kept
+            offset = 0 if first_page else 1
+            chunk = ("" if first_page else "\n") + page_text + "\n"
+            first_page = False
+            
+            pos = offset
+            for match in _SECTION_RE.finditer(chunk):
+                parts.append(chunk[pos:match.start()])
+                section_text = "".join(parts).strip()
                 if section_text:
-                    sections.append(section_text)
+                    yield title or "", section_text
+                
+                title = match.group().strip()
+                parts = []
+                pos = match.start()
+            parts.append(chunk[pos:])
+        
+        text = "".join(parts)
+        if title is not None:
+            section_text = text.strip()
+            if section_text:
+                yield title, section_text
         else:
             # If no clear sections found, split by double newlines
-            sections = [s.strip() for s in text.split('\n\n') if s.strip()]
-        
-        return sections
+            for section_text in text.split('\n\n'):
+                section_text = section_text.strip()
+                if section_text:
+                    yield "", section_text
     
     @staticmethod
     def encode_pdf_to_base64(pdf_file_path: str) -> str:
@@ -133,5 +244,5 @@ class PDFService:
                 pdf_bytes = pdf_file.read()
                 return base64.b64encode(pdf_bytes).decode('utf-8')
         except Exception as e:
-            logger.error(f"Error encoding PDF to base64: {e}")
+            logger.error("Error encoding PDF to base64: %s", e)
             raise
@@ -0,0 +1,55 @@
+import re
+from typing import FrozenSet, Iterable
+
+try:
+    import ahocorasick
+except ImportError:  # Optional C accelerator for MarkerScanner
+    ahocorasick = None
+
+# Patterns shared by the agents, compiled once at import
+
+# JSX / HTML tags
+OPEN_TAG = re.compile(r'<(\w+)(?:\s[^>]*)?(?<!/)>')
+CLOSE_TAG = re.compile(r'</(\w+)>')
+
+# ES module exports and imports
+EXPORTS = re.compile(r'export\s+(?:default\s+)?(?:function\s+)?(\w+)')
+IMPORTS = re.compile(r'import\s+(?:\{([^}]+)\}|\w+)\s+from\s+[\'"]([^\'"]+)[\'"]')
+
+# Prices such as "$12", "€ 9.50" or a bare "14.00"
+PRICE = re.compile(r'[$€£]\s?\d+(?:[.,]\d{2})?|\b\d+[.,]\d{2}\b')
+
+
+def count_matches(pattern: re.Pattern, text: str) -> int:
+    """Count the matches of a pattern without building a list of them."""
+    return sum(1 for _ in pattern.finditer(text))
+
+
+class MarkerScanner:
+    """
+    Find which of a fixed set of substrings occur in a text.
+    
+    With pyahocorasick installed all needles are matched in a single walk
+    over the text; otherwise each needle is checked with `in`.
+    """
+    
+    def __init__(self, needles: Iterable[str]):
+        self.needles = frozenset(needles)
+        self._automaton = None
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for needle in self.needles:
+                self._automaton.add_word(needle, needle)
+            self._automaton.make_automaton()
+    
+    def scan(self, text: str) -> FrozenSet[str]:
+        """Return the needles that occur in the text."""
+        if self._automaton is None:
+            return frozenset(needle for needle in self.needles if needle in text)
+        
+        seen = set()
+        for _, needle in self._automaton.iter(text):
+            seen.add(needle)
+            if len(seen) == len(self.needles):
+                break
+        return frozenset(seen)
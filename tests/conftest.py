@@ -0,0 +1,4 @@
+import os
+
+# Settings are read at import time and require an API key
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
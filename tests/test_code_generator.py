@@ -0,0 +1,72 @@
+import pytest
+from langchain_core.messages import AIMessageChunk
+
+from app.agents import code_generator
+from app.agents.llm_clients import get_response_cache
+from app.agents.state import AgentState
+from app.agents.validator import validator_agent
+from app.config import settings
+
+APP_FILE = '{"file_path": "src/App.jsx", "code": "import React from \'react\';\\nexport default function App() {}", "component_name": "App.jsx"}'
+INDEX_FILE = '{"file_path": "src/index.js", "code": "import React from \'react\';\\nimport App from \'./App\';", "component_name": "index.js"}'
+
+
+class FakeStreamingLLM:
+    """Streams a code generation response, optionally breaking off after the first file."""
+    
+    def __init__(self, drop_after_first_file: bool):
+        self.drop_after_first_file = drop_after_first_file
+        self.calls = 0
+    
+    async def astream(self, messages, **kwargs):
+        self.calls += 1
+        yield AIMessageChunk(content='{"components": [' + APP_FILE + ", ")
+        if self.drop_after_first_file:
+            raise ConnectionError("stream dropped")
+        yield AIMessageChunk(content=INDEX_FILE + "]}")
+
+
+@pytest.fixture
+def response_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "llm_cache_path", str(tmp_path / "llm_cache.db"))
+    get_response_cache.cache_clear()
+    yield get_response_cache()
+    get_response_cache.cache_clear()
+
+
+async def _generate_and_validate(llm: FakeStreamingLLM, monkeypatch) -> AgentState:
+    monkeypatch.setattr(code_generator, "get_llm", lambda temperature, cache=True: llm)
+    state = AgentState(pdf_content=None, restaurant_id=None, restaurant_name="Trattoria")
+    state = await code_generator.code_generator_agent(state)
+    return await validator_agent(state)
+
+
+@pytest.mark.asyncio
+async def test_dropped_stream_is_not_cached(response_cache, monkeypatch):
+    dropped = FakeStreamingLLM(drop_after_first_file=True)
+    state = await _generate_and_validate(dropped, monkeypatch)
+    
+    assert state.final_status == "failed"
+    assert state.generated_components == []
+    assert state.component_files == []
+    
+    # The identical request must call the model again instead of replaying the partial output
+    complete = FakeStreamingLLM(drop_after_first_file=False)
+    state = await _generate_and_validate(complete, monkeypatch)
+    
+    assert complete.calls == 1
+    assert state.final_status == "processing"
+    assert state.is_valid
+    assert [component["file_path"] for component in state.generated_components] == ["src/App.jsx", "src/index.js"]
+
+
+@pytest.mark.asyncio
+async def test_validated_components_are_served_from_cache(response_cache, monkeypatch):
+    first = FakeStreamingLLM(drop_after_first_file=False)
+    await _generate_and_validate(first, monkeypatch)
+    
+    second = FakeStreamingLLM(drop_after_first_file=False)
+    state = await _generate_and_validate(second, monkeypatch)
+    
+    assert second.calls == 0
+    assert len(state.generated_components) == 2